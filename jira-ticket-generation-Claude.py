@@ -27,7 +27,55 @@ def extract_summary_and_description(text):
 
     return summary, description
 
+def summarize_thread(previous_summary, messages):
+    """
+    Folds new thread messages into the rolling thread summary.
+    Only the messages newer than the last summarized one are sent,
+    together with the summary built so far.
+    """
+    transcript = "\n".join(messages)
+    prompt = f"""Human: You maintain a running summary of a Slack support thread. 
+Update the current summary with the new messages below. Keep it short, factual and in bullet points, 
+covering the problem, affected brand/environment, findings so far and any open questions. 
+Return only the updated summary without extra commentary.
+
+Current Summary:
+\"\"\"{previous_summary or "(none yet)"}\"\"\"
+
+New Messages:
+\"\"\"{transcript}\"\"\"
+
+Assistant:"""
+
+    response = bedrock.invoke_model(
+        modelId=MODEL_ID,
+        contentType="application/json",
+        accept="application/json",
+        body=json.dumps({
+            "prompt": prompt,
+            "max_tokens_to_sample": MAX_TOKENS,
+            "temperature": 0.3,
+            "stop_sequences": ["\n\nHuman:"]
+        })
+    )
+
+    response_body = json.loads(response["body"].read())
+    return response_body.get("completion", "").strip()
+
 def lambda_handler(event, context):
+    if event.get("mode") == "thread_summary":
+        try:
+            summary = summarize_thread(event.get("summary", ""), event.get("messages", []))
+            return {
+                "statusCode": 200,
+                "body": json.dumps({"summary": summary})
+            }
+        except Exception as e:
+            return {
+                "statusCode": 500,
+                "body": json.dumps({"error": str(e)})
+            }
+
     user_input = event.get("text", "")
 
     if not user_input.strip():
@@ -1,4 +1,5 @@
 import json
+import hashlib
 import logging
 import requests
 import time
@@ -24,6 +25,36 @@ MODEL_ID = "anthropic.claude-v2"
 MAX_TOKENS = 1024
 TOP_K_MATCHES = 5
 MAX_RETRIES = 3
+# Channel -> brand/component scoping. Entries in CHANNEL_SCOPE_TABLE override CHANNEL_SCOPES.
+CHANNEL_SCOPE_TABLE = "slack_channel_scopes"
+CHANNEL_SCOPE_CACHE_TTL = 300
+CHANNEL_SCOPES = {
+    # "C0123456789": {"brand": "Sunoco", "component": "Loyalty"},
+}
+# Brands indexed into their own namespace. Tickets live in exactly one namespace, so NAMESPACE
+# holds only the brands not listed here and a global search queries all of them.
+BRAND_NAMESPACES = {
+    # "Sunoco": "sunoco",
+}
+# Metadata filters need "brand"/"component" list fields on the indexed vectors. The "build_digests"
+# mode backfills them from the JIRA brand field and components; turn this on once a full run has
+# completed, otherwise scoped queries come back empty and cost an extra Pinecone round trip.
+# With this off and no BRAND_NAMESPACES, no channel scope is looked up at all.
+METADATA_FILTERS_ENABLED = False
+BRAND_METADATA_FIELD = "brand"
+COMPONENT_METADATA_FIELD = "component"
+JIRA_BRAND_FIELD = "customfield_11997"
+# Precomputed ticket digests (Claude bullet summaries), refreshed by the "build_digests" mode.
+DIGEST_TABLE = "jira_ticket_digests"
+DIGEST_FINAL_STATUSES = {"Closed", "Done", "Resolved"}
+# Ages are measured from verified_at, refreshed whenever a digest's fingerprint is confirmed.
+# Final-status digests are served without a JIRA check until they are DIGEST_FINAL_MAX_AGE old.
+# build_digests re-checks every ticket, closed ones included, once per DIGEST_VERIFY_INTERVAL
+# (keep it at the job's schedule), so reopened tickets are caught and a run that stops early
+# resumes past the tickets already verified instead of restarting from the top.
+DIGEST_FINAL_MAX_AGE = 7 * 24 * 3600
+DIGEST_VERIFY_INTERVAL = 24 * 3600
+NO_SUMMARY_TEXT = "<No summary returned>"
 
 # === Setup ===
 logger = logging.getLogger()
@@ -32,16 +63,24 @@ bedrock = boto3.client("bedrock-runtime", region_name=REGION)
 BEDROCK_CLAUDE = boto3.client("bedrock-runtime", region_name="us-east-1")
 pc = Pinecone(api_key=PINECONE_API_KEY)
 index = pc.Index(PINECONE_INDEX)
+dynamo = boto3.resource("dynamodb", region_name=REGION)
+channel_scope_table = dynamo.Table(CHANNEL_SCOPE_TABLE)
+digest_table = dynamo.Table(DIGEST_TABLE)
+channel_scope_cache = {}
 
 # === JIRA Fetch ===
-def fetch_summary_and_description(issue_key):
-    url = f"{BASE_URL}/issue/{issue_key}?fields=summary"
+def parse_issue_key(raw_key):
+    if "/browse/" in raw_key:
+        return raw_key.split("/browse/")[-1].strip("/"), raw_key
+    return raw_key, f"https://{JIRA_DOMAIN}/browse/{raw_key}"
+
+def fetch_issue_fields(issue_key):
+    url = f"{BASE_URL}/issue/{issue_key}?fields=summary,updated,status,components,{JIRA_BRAND_FIELD}"
     res = requests.get(url, headers=AUTH_HEADER)
     if res.status_code != 200:
         logger.error(f"Failed to fetch issue {issue_key}: {res.status_code} {res.text}")
-        return ""
-    data = res.json()
-    return data.get("fields", {}).get("summary", "")
+        return {}
+    return res.json().get("fields", {})
 
 def fetch_latest_comments(issue_key):
     url = f"{BASE_URL}/issue/{issue_key}/comment?orderBy=-created&maxResults=30"
@@ -79,7 +118,164 @@ def summarize_with_claude(prompt_text):
         accept="application/json"
     )
     result = json.loads(response["body"].read())
-    return result.get("completion", "<No summary returned>")
+    return result.get("completion", NO_SUMMARY_TEXT)
+
+# === Ticket Digests ===
+def ticket_fingerprint(fields):
+    """Fingerprint of the JIRA source a digest was built from; changes whenever the issue is edited or commented on."""
+    source = f"{fields.get('summary', '')}\n{fields.get('status', {}).get('name', '')}\n{fields.get('updated', '')}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+def get_ticket_digest(issue_key):
+    try:
+        return digest_table.get_item(Key={"issue_key": issue_key}).get("Item")
+    except Exception as e:
+        logger.error(f"Error reading digest for {issue_key}: {e}")
+        return None
+
+def ticket_scope(fields):
+    """Brand and component values of an issue, as lists for Pinecone metadata."""
+    return {
+        BRAND_METADATA_FIELD: [b["value"] for b in fields.get(JIRA_BRAND_FIELD) or [] if b.get("value")],
+        COMPONENT_METADATA_FIELD: [c["name"] for c in fields.get("components") or [] if c.get("name")]
+    }
+
+def generate_ticket_digest(issue_key, fields):
+    """
+    Summarize the issue with Claude and store the digest with its source fingerprint.
+    Empty completions are returned for rendering but not stored, so the next lookup retries them.
+    """
+    summary = fields.get("summary", "")
+    comments = fetch_latest_comments(issue_key)
+    prompt = build_prompt(issue_key, summary, comments)
+    digest = {
+        "issue_key": issue_key,
+        "summary": summary,
+        "status": fields.get("status", {}).get("name", ""),
+        "fingerprint": ticket_fingerprint(fields),
+        "digest": summarize_with_claude(prompt).strip(),
+        "generated_at": int(time.time()),
+        "verified_at": int(time.time()),
+        **ticket_scope(fields)
+    }
+    if digest["digest"] in ("", NO_SUMMARY_TEXT):
+        logger.warning(f"Claude returned no summary for {issue_key}, digest not stored")
+        return digest
+    try:
+        digest_table.put_item(Item=digest)
+    except Exception as e:
+        logger.error(f"Error writing digest for {issue_key}: {e}")
+    return digest
+
+def mark_digest_verified(issue_key, scope):
+    try:
+        digest_table.update_item(
+            Key={"issue_key": issue_key},
+            UpdateExpression="SET verified_at = :now, #brand = :brand, #component = :component",
+            ExpressionAttributeNames={"#brand": BRAND_METADATA_FIELD, "#component": COMPONENT_METADATA_FIELD},
+            ExpressionAttributeValues={
+                ":now": int(time.time()),
+                ":brand": scope[BRAND_METADATA_FIELD],
+                ":component": scope[COMPONENT_METADATA_FIELD]
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error updating verified_at for {issue_key}: {e}")
+
+def refresh_ticket_digest(issue_key, final_max_age=DIGEST_FINAL_MAX_AGE, max_age=0):
+    """
+    Return (digest, regenerated) for an issue, calling Claude only when the stored digest is
+    missing or its fingerprint is stale. A digest verified less than max_age ago (final_max_age
+    for tickets in a final status) is returned without touching JIRA.
+    digest is None when the issue cannot be fetched.
+    """
+    digest = get_ticket_digest(issue_key)
+    # Digests stored before brand/component tracking are re-verified once to pick those up
+    if digest and BRAND_METADATA_FIELD in digest:
+        age = time.time() - int(digest.get("verified_at", digest.get("generated_at", 0)))
+        if age < max_age or (digest.get("status") in DIGEST_FINAL_STATUSES and age < final_max_age):
+            return digest, False
+
+    fields = fetch_issue_fields(issue_key)
+    if not fields.get("summary"):
+        return None, False
+    if digest and digest.get("fingerprint") == ticket_fingerprint(fields):
+        scope = ticket_scope(fields)
+        mark_digest_verified(issue_key, scope)
+        digest.update(scope)
+        return digest, False
+    logger.info(f"Digest for {issue_key} is missing or stale, regenerating")
+    return generate_ticket_digest(issue_key, fields), True
+
+def list_indexed_vectors():
+    """Yield (namespace, vector_id, issue_key, metadata) for every vector in the shared and per-brand namespaces."""
+    for namespace in {NAMESPACE, *BRAND_NAMESPACES.values()}:
+        try:
+            for ids in index.list(namespace=namespace):
+                fetched = index.fetch(ids=ids, namespace=namespace)
+                for vector_id, vector in fetched.vectors.items():
+                    metadata = vector.metadata or {}
+                    raw_key = metadata.get("key", "")
+                    if raw_key:
+                        yield namespace, vector_id, parse_issue_key(raw_key)[0], metadata
+        except Exception as e:
+            logger.error(f"Error listing vectors in namespace {namespace}: {e}")
+
+def backfill_vector_scope(namespace, vector_id, metadata, digest):
+    """Copy the digest's brand/component onto the vector's metadata when they differ; returns True if updated."""
+    scope = {k: list(digest.get(k) or []) for k in (BRAND_METADATA_FIELD, COMPONENT_METADATA_FIELD)}
+    if all(list(metadata.get(k) or []) == v for k, v in scope.items()):
+        return False
+    index.update(id=vector_id, set_metadata=scope, namespace=namespace)
+    return True
+
+def build_digests(event, context):
+    """
+    Offline job: precompute digests for indexed tickets whose stored digest is missing or stale,
+    and backfill brand/component metadata onto their vectors for scoped search.
+    Final-status tickets are re-checked too, so reopened or newly commented tickets are refreshed.
+    """
+    if event.get("issue_keys"):
+        vectors = ((None, None, issue_key, {}) for issue_key in event["issue_keys"])
+    else:
+        vectors = list_indexed_vectors()
+    counts = {"checked": 0, "generated": 0, "skipped": 0, "failed": 0, "backfilled": 0}
+    digests = {}
+    for namespace, vector_id, issue_key, metadata in vectors:
+        if issue_key not in digests:
+            # Leave headroom so a scheduled run finishes cleanly; the next run skips the tickets
+            # verified here and picks up the rest.
+            if context and context.get_remaining_time_in_millis() < 60000:
+                logger.warning("Stopping digest build early, Lambda time almost exhausted")
+                break
+            counts["checked"] += 1
+            digest = None
+            try:
+                digest, regenerated = refresh_ticket_digest(issue_key, final_max_age=0, max_age=DIGEST_VERIFY_INTERVAL)
+                if digest is None:
+                    logger.error(f"Could not fetch {issue_key} from JIRA")
+                    counts["failed"] += 1
+                elif not regenerated:
+                    counts["skipped"] += 1
+                elif digest["digest"] in ("", NO_SUMMARY_TEXT):
+                    counts["failed"] += 1
+                else:
+                    counts["generated"] += 1
+            except Exception as e:
+                logger.error(f"Error building digest for {issue_key}: {e}")
+                counts["failed"] += 1
+            digests[issue_key] = digest
+
+        digest = digests[issue_key]
+        if vector_id and digest:
+            try:
+                if backfill_vector_scope(namespace, vector_id, metadata, digest):
+                    counts["backfilled"] += 1
+            except Exception as e:
+                logger.error(f"Error backfilling metadata for vector {vector_id}: {e}")
+                counts["failed"] += 1
+    logger.info(f"Digest build finished: {counts}")
+    return {"statusCode": 200, "body": json.dumps(counts)}
 
 # === Titan Embedding ===
 def get_query_embedding(text):
@@ -93,18 +289,71 @@ def get_query_embedding(text):
     result = json.loads(response["body"].read())
     return result["embedding"]
 
+# === Channel Scope Lookup ===
+def get_channel_scope(channel):
+    """Return {"brand": ..., "component": ...} for a channel, cached across warm invocations."""
+    cached = channel_scope_cache.get(channel)
+    if cached and cached[1] > time.time():
+        return cached[0]
+
+    scope = dict(CHANNEL_SCOPES.get(channel, {}))
+    try:
+        item = channel_scope_table.get_item(Key={"channel": channel}).get("Item")
+        if item:
+            scope = {k: item[k] for k in ("brand", "component") if item.get(k)}
+    except Exception as e:
+        logger.error(f"Error reading channel scope for {channel}: {e}")
+
+    channel_scope_cache[channel] = (scope, time.time() + CHANNEL_SCOPE_CACHE_TTL)
+    return scope
+
 # === Pinecone Semantic Search ===
-def search_pinecone(query, top_k=TOP_K_MATCHES):
-    embedding = get_query_embedding(query)
-    response = index.query(
-        namespace=NAMESPACE,
-        vector=embedding,
-        top_k=top_k,
-        include_metadata=True
-    )
+def query_pinecone(embedding, top_k, namespace=NAMESPACE, metadata_filter=None):
+    params = {
+        "namespace": namespace,
+        "vector": embedding,
+        "top_k": top_k,
+        "include_metadata": True
+    }
+    if metadata_filter:
+        params["filter"] = metadata_filter
+    response = index.query(**params)
     matches = response.get("matches", [])
     return [m for m in matches if m["score"] >= SCORE_THRESHOLD]
 
+def search_all_namespaces(embedding, top_k, skip_namespace=None):
+    matches = []
+    for namespace in {NAMESPACE, *BRAND_NAMESPACES.values()} - {skip_namespace}:
+        matches.extend(query_pinecone(embedding, top_k, namespace))
+    matches.sort(key=lambda x: x["score"], reverse=True)
+    return matches[:top_k]
+
+def search_pinecone(query, top_k=TOP_K_MATCHES, scope=None):
+    embedding = get_query_embedding(query)
+    scope = scope or {}
+    brand = scope.get("brand")
+    component = scope.get("component")
+    namespace = BRAND_NAMESPACES.get(brand)
+
+    metadata_filter = {}
+    if METADATA_FILTERS_ENABLED:
+        if brand and not namespace:
+            metadata_filter[BRAND_METADATA_FIELD] = {"$in": [brand]}
+        if component:
+            metadata_filter[COMPONENT_METADATA_FIELD] = {"$in": [component]}
+
+    searched_namespace = None
+    if namespace or metadata_filter:
+        matches = query_pinecone(embedding, top_k, namespace or NAMESPACE, metadata_filter)
+        if matches:
+            return matches
+        logger.info(f"No scoped matches for {scope}, falling back to global search")
+        # An unfiltered brand namespace that came back empty has nothing more to offer
+        if not metadata_filter:
+            searched_namespace = namespace
+
+    return search_all_namespaces(embedding, top_k, skip_namespace=searched_namespace)
+
 # === Slack Posting with Retry ===
 def send_slack_message_with_retry(channel, thread_ts, blocks):
     headers = {
@@ -145,12 +394,17 @@ def send_slack_message_with_retry(channel, thread_ts, blocks):
 def lambda_handler(event, context):
     try:
         logger.info("Event: %s", json.dumps(event))
+        if event.get("mode") == "build_digests":
+            return build_digests(event, context)
+
         channel = event.get("channel")
         thread_ts = event.get("thread_ts")
         text = event.get("text", "")
 
-        logger.info(f"Searching Pinecone with query: {text}")
-        matches = search_pinecone(text)
+        scoping_configured = METADATA_FILTERS_ENABLED or BRAND_NAMESPACES
+        scope = get_channel_scope(channel) if channel and scoping_configured else {}
+        logger.info(f"Searching Pinecone with query: {text} (scope: {scope})")
+        matches = search_pinecone(text, scope=scope)
         logger.info(f"Found {len(matches)} matches")
 
         if not matches:
@@ -169,21 +423,14 @@ def lambda_handler(event, context):
             raw_key = match["metadata"].get("key", "")
             logger.info(f"[{idx}] Processing raw key: {raw_key}")
 
-            if "/browse/" in raw_key:
-                issue_key = raw_key.split("/browse/")[-1].strip("/")
-                issue_url = raw_key
-            else:
-                issue_key = raw_key
-                issue_url = f"https://{JIRA_DOMAIN}/browse/{issue_key}"
+            issue_key, issue_url = parse_issue_key(raw_key)
 
-            summary = fetch_summary_and_description(issue_key)
-            if not summary:
+            digest, _ = refresh_ticket_digest(issue_key)
+            if not digest or not digest.get("summary"):
                 logger.warning(f"No summary for issue {issue_key}, skipping.")
                 continue
-
-            comments = fetch_latest_comments(issue_key)
-            prompt = build_prompt(issue_key, summary, comments)
-            ticket_summary = summarize_with_claude(prompt)
+            summary = digest["summary"]
+            ticket_summary = digest["digest"]
 
             trophy = ":trophy: " if idx == 1 else ""
             blocks = [
@@ -3,6 +3,7 @@ import boto3
 import logging
 import os
 import base64
+import time
 import requests
 from urllib.parse import parse_qs
 #from slack_sdk import WebClient
@@ -27,6 +28,28 @@ SEARCH_FUNCTION_NAME = os.environ.get("SEARCH_FUNCTION_NAME")
 CLAUDE_FUNCTION_NAME="jira-ticket-generation-Claude"
 event_table = dynamo.Table("slack_events")
 
+# Thread context (optional): rolling per-thread summary cached by channel + thread_ts
+THREAD_CONTEXT_ENABLED = os.environ.get("THREAD_CONTEXT_ENABLED", "false").lower() == "true"
+THREAD_REPLIES_PAGE_SIZE = 200
+# New messages are folded into the summary in batches so long threads never produce one huge prompt
+THREAD_SUMMARY_BATCH_SIZE = 40
+THREAD_SUMMARY_BATCH_CHARS = 12000
+# Each mention folds at most this many batches, and stops early when the Lambda is running low on
+# time, so summarization never pushes the search past the API Gateway 29s limit. Progress is saved
+# per batch, so later mentions continue where the previous one stopped.
+THREAD_SUMMARY_MAX_BATCHES = 3
+THREAD_SUMMARY_MIN_REMAINING_MS = 20000
+thread_summary_table = dynamo.Table(os.environ.get("THREAD_SUMMARY_TABLE", "slack_thread_summaries"))
+
+# Traffic recording (optional): sanitized payloads as JSONL records for slack-event-replay.py.
+# RECORD_EVENTS_LOG writes each record to the log stream prefixed with RECORD_LOG_PREFIX, which is
+# durable in CloudWatch Logs. RECORD_EVENTS_PATH appends to a local file; inside Lambda only /tmp is
+# writable and that file is per-container and lost on recycle, so use it for local runs only.
+RECORD_EVENTS_LOG = os.environ.get("RECORD_EVENTS_LOG", "false").lower() == "true"
+RECORD_EVENTS_PATH = os.environ.get("RECORD_EVENTS_PATH")
+RECORD_LOG_PREFIX = "SLACK_EVENT_RECORD "
+RECORD_REDACTED_KEYS = {"token", "trigger_id", "response_url", "response_urls", "hash", "authorizations", "enterprise"}
+
 
 # --- Prevent duplicate event processing ---
 def is_duplicate_event(event_id):
@@ -43,6 +66,152 @@ def mark_event_processed(event_id):
     except Exception as e:
         logger.error(f"Error writing event_id to DynamoDB: {e}")
 
+# --- Record incoming payloads for replay ---
+def sanitize_payload(value):
+    if isinstance(value, dict):
+        return {
+            k: "REDACTED" if k in RECORD_REDACTED_KEYS else sanitize_payload(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [sanitize_payload(v) for v in value]
+    return value
+
+def record_event(body, content_type):
+    if not (RECORD_EVENTS_LOG or RECORD_EVENTS_PATH):
+        return
+    try:
+        record = {
+            "request_id": body.get("event_id") or f"{body.get('type')}-{time.time_ns()}",
+            "type": body.get("type"),
+            "content_type": content_type,
+            "received_at": time.time(),
+            "body": sanitize_payload(body)
+        }
+        if RECORD_EVENTS_LOG:
+            logger.info(RECORD_LOG_PREFIX + json.dumps(record))
+        if RECORD_EVENTS_PATH:
+            with open(RECORD_EVENTS_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+    except Exception as e:
+        logger.error(f"Error recording Slack payload: {e}")
+
+# --- Thread context summarization ---
+def fetch_thread_replies(channel, thread_ts, oldest=None):
+    """Fetch all replies of a thread via paginated conversations.replies, oldest first."""
+    messages = []
+    cursor = None
+    while True:
+        params = {"channel": channel, "ts": thread_ts, "limit": THREAD_REPLIES_PAGE_SIZE}
+        if oldest:
+            params["oldest"] = oldest
+        if cursor:
+            params["cursor"] = cursor
+        data = slack_get("conversations.replies", params)
+        if not data.get("ok"):
+            logger.error(f"conversations.replies failed: {data.get('error')}")
+            break
+        messages.extend(data.get("messages", []))
+        cursor = data.get("response_metadata", {}).get("next_cursor")
+        if not cursor:
+            break
+    return messages
+
+def batch_thread_messages(messages):
+    """Split messages into batches bounded by THREAD_SUMMARY_BATCH_SIZE and THREAD_SUMMARY_BATCH_CHARS."""
+    batch, size = [], 0
+    for m in messages:
+        line = f"<@{m.get('user', 'unknown')}>: {m['text']}"[:THREAD_SUMMARY_BATCH_CHARS]
+        if batch and (len(batch) >= THREAD_SUMMARY_BATCH_SIZE or size + len(line) > THREAD_SUMMARY_BATCH_CHARS):
+            yield batch
+            batch, size = [], 0
+        batch.append((m["ts"], line))
+        size += len(line)
+    if batch:
+        yield batch
+
+def fold_thread_summary(summary, lines):
+    """Ask the Claude lambda to fold new message lines into the summary; returns None on failure."""
+    try:
+        response = LAMBDA_CLIENT.invoke(
+            FunctionName=CLAUDE_FUNCTION_NAME,
+            InvocationType="RequestResponse",
+            Payload=json.dumps({
+                "mode": "thread_summary",
+                "summary": summary,
+                "messages": lines
+            }).encode("utf-8")
+        )
+        result = json.loads(response["Payload"].read())
+        body = json.loads(result.get("body", "{}"))
+        if result.get("statusCode") != 200 or not body.get("summary"):
+            logger.error(f"Thread summarization failed: {body.get('error')}")
+            return None
+        return body["summary"]
+    except Exception as e:
+        logger.error(f"Error invoking Claude Lambda for thread summary: {e}")
+        return None
+
+def get_thread_context(channel, thread_ts, mention_ts, context=None):
+    """
+    Return the rolling summary of a thread, updated with only the messages
+    newer than the last processed ts. The summary is cached by channel + thread_ts
+    and saved after every folded batch, so a failure keeps the progress made so far.
+    The first look at a long thread summarizes the parent plus the most recent messages.
+    """
+    thread_key = f"{channel}:{thread_ts}"
+    cached = {}
+    try:
+        cached = thread_summary_table.get_item(Key={"thread_key": thread_key}).get("Item", {})
+    except Exception as e:
+        logger.error(f"Error reading thread summary from DynamoDB: {e}")
+
+    summary = cached.get("summary", "")
+    last_ts = cached.get("last_ts")
+
+    try:
+        replies = fetch_thread_replies(channel, thread_ts, oldest=last_ts)
+    except Exception as e:
+        logger.error(f"Error fetching thread replies: {e}")
+        return summary
+
+    # conversations.replies always returns the parent message, so filter on ts as well as oldest.
+    # Bot messages (our own match posts) and the current mention are left out of the summary.
+    new_messages = [
+        m for m in replies
+        if (not last_ts or float(m["ts"]) > float(last_ts))
+        and float(m["ts"]) < float(mention_ts)
+        and not m.get("bot_id")
+        and m.get("text")
+    ]
+
+    if not cached:
+        recent_limit = THREAD_SUMMARY_MAX_BATCHES * THREAD_SUMMARY_BATCH_SIZE
+        if len(new_messages) > recent_limit:
+            new_messages = new_messages[:1] + new_messages[-(recent_limit - 1):]
+
+    for idx, batch in enumerate(batch_thread_messages(new_messages)):
+        if idx >= THREAD_SUMMARY_MAX_BATCHES or (
+            context and context.get_remaining_time_in_millis() < THREAD_SUMMARY_MIN_REMAINING_MS
+        ):
+            logger.info(f"Thread summary for {thread_key} partially folded, continuing on a later mention")
+            break
+        folded = fold_thread_summary(summary, [line for _, line in batch])
+        if not folded:
+            break
+        summary = folded
+        try:
+            thread_summary_table.put_item(Item={
+                "thread_key": thread_key,
+                "channel": channel,
+                "thread_ts": thread_ts,
+                "summary": summary,
+                "last_ts": batch[-1][0]
+            })
+        except Exception as e:
+            logger.error(f"Error writing thread summary to DynamoDB: {e}")
+    return summary
+
 def lambda_handler(event, context):
     try:
         raw_body = event.get("body", "")
@@ -60,6 +229,7 @@ def lambda_handler(event, context):
 
             body = json.loads(payload_str)
             logger.info(f"Slack interactive payload: {json.dumps(body)}")
+            record_event(body, content_type)
 
             if body.get("type") == "block_actions":
                 action_id = body["actions"][0]["action_id"]
@@ -82,6 +252,7 @@ def lambda_handler(event, context):
 
         body = json.loads(raw_body)
         logger.info(f"Slack event body: {json.dumps(body)}")
+        record_event(body, content_type)
 
         if body.get("type") == "url_verification":
             return {"statusCode": 200, "body": body.get("challenge")}
@@ -110,10 +281,18 @@ def lambda_handler(event, context):
 
                 slack_post("chat.postMessage", payload)
 
+                # Mentions inside an existing thread get the thread's rolling summary as context
+                query_text = user_message
+                parent_ts = event_data.get("thread_ts")
+                if THREAD_CONTEXT_ENABLED and parent_ts and parent_ts != thread_ts:
+                    thread_summary = get_thread_context(channel, parent_ts, thread_ts, context)
+                    if thread_summary:
+                        query_text = f"{user_message}\n\nThread context:\n{thread_summary}"
+
                 # Call Search Lambda
                 search_payload = {
                     "channel": channel,
-                    "text": user_message,
+                    "text": query_text,
                     "thread_ts": thread_ts
                 }
                 search_response = LAMBDA_CLIENT.invoke(
@@ -128,7 +307,7 @@ def lambda_handler(event, context):
                     response = LAMBDA_CLIENT.invoke(
                         FunctionName=CLAUDE_FUNCTION_NAME,
                         InvocationType="RequestResponse",
-                        Payload=json.dumps({"text": user_message}).encode("utf-8")
+                        Payload=json.dumps({"text": query_text}).encode("utf-8")
                     )
                     result = json.loads(response["Payload"].read())
                     body = json.loads(result.get("body", "{}"))
@@ -435,6 +614,13 @@ def handle_modal_submission(body):
         "headers": {"Content-Type": "application/json"},
         "body": json.dumps({})
     }
+# --- Send GET to Slack API ---
+def slack_get(endpoint, params):
+    headers = {"Authorization": f"Bearer {SLACK_BOT_TOKEN}"}
+    response = requests.get(f"{SLACK_API_URL}/{endpoint}", headers=headers, params=params)
+    logger.info(f"Slack {endpoint} response status: {response.status_code}")
+    return response.json()
+
 # --- Send POST to Slack API ---
 def slack_post(endpoint, payload):
     headers = {
@@ -0,0 +1,235 @@
+"""
+Replay recorded Slack traffic against slack-bot-handler_main.lambda_handler.
+
+Reads a JSONL file written by the handler's recorder (RECORD_EVENTS_PATH), one
+payload per line, or a CloudWatch Logs export of records written with
+RECORD_EVENTS_LOG (lines containing the SLACK_EVENT_RECORD prefix), and sends
+the payloads to the handler at a configurable rate and concurrency. Throughput
+counts completed sends only; failed sends are reported under "errors". AWS (Lambda, DynamoDB) and HTTP (Slack, JIRA) are replaced by
+in-process fakes, so no credentials or network are needed.
+
+Usage:
+    python slack-event-replay.py recorded_events.jsonl --rate 20 --concurrency 8
+"""
+import argparse
+import importlib.util
+import io
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+HANDLER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "slack-bot-handler_main.py")
+RECORD_LOG_PREFIX = "SLACK_EVENT_RECORD "
+SERVICE_LATENCY = 0.0
+# Partition key of each DynamoDB table the handler uses, mirroring the deployed key schemas
+TABLE_KEYS = {
+    "slack_events": "event_id",
+    os.environ.get("THREAD_SUMMARY_TABLE", "slack_thread_summaries"): "thread_key",
+}
+
+
+# === Local service fakes ===
+def simulate_latency():
+    if SERVICE_LATENCY:
+        time.sleep(SERVICE_LATENCY)
+
+class FakeTable:
+    def __init__(self, name, key_name):
+        self.name = name
+        self.key_name = key_name
+        self.items = {}
+        self.lock = threading.Lock()
+
+    def get_item(self, Key):
+        simulate_latency()
+        with self.lock:
+            item = self.items.get(Key[self.key_name])
+        return {"Item": item} if item is not None else {}
+
+    def put_item(self, Item):
+        simulate_latency()
+        with self.lock:
+            self.items[Item[self.key_name]] = Item
+        return {}
+
+class FakeDynamoResource:
+    def __init__(self, table_keys):
+        self.table_keys = table_keys
+        self.tables = {}
+
+    def Table(self, name):
+        if name not in self.table_keys:
+            raise KeyError(f"No key schema for DynamoDB table {name}; add it to TABLE_KEYS")
+        return self.tables.setdefault(name, FakeTable(name, self.table_keys[name]))
+
+class FakeLambdaClient:
+    def invoke(self, FunctionName, InvocationType, Payload):
+        simulate_latency()
+        event = json.loads(Payload)
+        if event.get("mode") == "thread_summary":
+            body = {"summary": "- replayed thread summary"}
+        elif "channel" in event:
+            body = "Posted top matches to Slack"
+        else:
+            text = event.get("text", "")
+            body = {"summary": text[:80], "description": text}
+        result = {"statusCode": 200, "body": json.dumps(body)}
+        return {"StatusCode": 200, "Payload": io.BytesIO(json.dumps(result).encode("utf-8"))}
+
+class FakeResponse:
+    def __init__(self, data, status_code=200):
+        self.status_code = status_code
+        self.text = json.dumps(data)
+        self._data = data
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        pass
+
+def fake_post(url, headers=None, json=None, **kwargs):
+    simulate_latency()
+    if json and "fields" in json:
+        return FakeResponse({"key": "CJ-0"}, 201)
+    return FakeResponse({"ok": True})
+
+def fake_get(url, headers=None, params=None, **kwargs):
+    simulate_latency()
+    return FakeResponse({"ok": True, "messages": [], "response_metadata": {"next_cursor": ""}})
+
+def load_handler():
+    """Import the handler module with boto3 and requests swapped for the fakes above."""
+    dynamo = FakeDynamoResource(TABLE_KEYS)
+    lambda_client = FakeLambdaClient()
+    sys.modules["boto3"] = types.SimpleNamespace(
+        client=lambda *args, **kwargs: lambda_client,
+        resource=lambda *args, **kwargs: dynamo
+    )
+    sys.modules["requests"] = types.SimpleNamespace(post=fake_post, get=fake_get)
+    os.environ.pop("RECORD_EVENTS_PATH", None)
+    os.environ.pop("RECORD_EVENTS_LOG", None)
+    os.environ.setdefault("SLACK_API_URL", "https://slack.com/api")
+    os.environ.setdefault("SEARCH_FUNCTION_NAME", "jira-ticket-search")
+
+    spec = importlib.util.spec_from_file_location("slack_bot_handler_main", HANDLER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# === Replay ===
+def to_lambda_event(record):
+    """Rebuild the API Gateway event the handler received for a recorded payload."""
+    content_type = record.get("content_type") or "application/json"
+    if content_type.startswith("application/x-www-form-urlencoded"):
+        raw_body = urlencode({"payload": json.dumps(record["body"])})
+    else:
+        raw_body = json.dumps(record["body"])
+    return {"body": raw_body, "isBase64Encoded": False, "headers": {"content-type": content_type}}
+
+def load_records(path, repeat):
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if RECORD_LOG_PREFIX in line:
+                line = line.split(RECORD_LOG_PREFIX, 1)[1]
+            if line.strip():
+                records.append(json.loads(line))
+    return records * repeat
+
+def peak_rss_mb():
+    """Peak resident set size of this process; ru_maxrss is KiB on Linux and bytes on macOS."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+def replay(handler, records, rate, concurrency):
+    latencies = []
+    statuses = {}
+    duplicates = 0
+    event_callbacks = 0
+    lock = threading.Lock()
+
+    def send(record, scheduled):
+        # Latency is measured from the scheduled send time so queueing in the pool is counted
+        nonlocal duplicates, event_callbacks
+        event = to_lambda_event(record)
+        response = handler.lambda_handler(event, None)
+        elapsed = time.perf_counter() - scheduled
+        with lock:
+            latencies.append(elapsed)
+            statuses[response.get("statusCode")] = statuses.get(response.get("statusCode"), 0) + 1
+            if record.get("type") == "event_callback":
+                event_callbacks += 1
+                if response.get("body") == "Duplicate ignored":
+                    duplicates += 1
+
+    futures = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i, record in enumerate(records):
+            scheduled = started + i / rate if rate else time.perf_counter()
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(send, record, scheduled))
+    duration = time.perf_counter() - started
+
+    errors = 0
+    for future in futures:
+        if future.exception() is not None:
+            errors += 1
+            print(f"Replay error: {future.exception()!r}", file=sys.stderr)
+
+    completed = len(latencies)
+    return {
+        "requests": len(records),
+        "completed": completed,
+        "errors": errors,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(completed / duration, 2) if duration else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies, default=0.0) * 1000, 2)
+        },
+        "status_codes": statuses,
+        "duplicate_suppression_rate": round(duplicates / event_callbacks, 4) if event_callbacks else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 2)
+    }
+
+def main():
+    global SERVICE_LATENCY
+    parser = argparse.ArgumentParser(description="Replay recorded Slack payloads against the bot handler.")
+    parser.add_argument("path", help="JSONL file of recorded payloads")
+    parser.add_argument("--rate", type=float, default=10.0, help="requests per second (0 = as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent handler invocations")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the file N times (repeats exercise duplicate suppression)")
+    parser.add_argument("--service-latency-ms", type=float, default=0.0, help="latency added to every faked service call")
+    args = parser.parse_args()
+
+    SERVICE_LATENCY = args.service_latency_ms / 1000
+    logging.disable(logging.INFO)
+    handler = load_handler()
+    records = load_records(args.path, args.repeat)
+    print(json.dumps(replay(handler, records, args.rate, args.concurrency), indent=2))
+
+if __name__ == "__main__":
+    main()